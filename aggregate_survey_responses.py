@@ -7,45 +7,62 @@ Accepts multiple response CSVs; use --output to write (JSON or CSV).
 import argparse
 import csv
 import json
+from collections.abc import Iterator
 from pathlib import Path
 
+import numpy as np
+
 from config import CATEGORIES, SURVEY_MAPPING_CSV
 
 LABELS = ["very_low", "low", "medium", "high", "very_high"]
 
 
-def load_mapping_with_category(path: Path) -> tuple[dict[str, int], dict[str, str]]:
-    """Return (clip_id -> level_db, clip_id -> category)."""
-    clip_to_db = {}
-    clip_to_category = {}
+def load_mapping_with_category(path: Path) -> dict[str, tuple[str, int]]:
+    """Return clip_id -> (category, level_db)."""
+    clip_info = {}
     with open(path, newline="") as f:
-        r = csv.DictReader(f)
+        r = csv.reader(f)
+        header = next(r, [])
+        cid_i = header.index("clip_id")
+        cat_i = header.index("category")
+        db_i = header.index("level_db")
         for row in r:
-            cid = row["clip_id"]
-            clip_to_db[cid] = int(row["level_db"])
-            clip_to_category[cid] = row["category"]
-    return clip_to_db, clip_to_category
+            if row:
+                clip_info[row[cid_i]] = (row[cat_i], int(row[db_i]))
+    return clip_info
 
 
-def load_responses(path: Path) -> list[tuple[str, str]]:
-    """(clip_id, label) list. Expects CSV with columns clip_id and label."""
-    out = []
+def load_responses(path: Path) -> Iterator[tuple[str, str]]:
+    """Yield (clip_id, label) rows. Expects CSV with columns clip_id and label."""
     with open(path, newline="") as f:
-        r = csv.DictReader(f)
+        r = csv.reader(f)
+        header = [h.strip() for h in next(r, [])]
+        if "clip_id" not in header or "label" not in header:
+            print(f"Skip {path}: missing clip_id/label columns")
+            return
+        cid_i = header.index("clip_id")
+        lbl_i = header.index("label")
+        width = max(cid_i, lbl_i) + 1
         for row in r:
-            cid = row.get("clip_id", "").strip()
-            label = row.get("label", "").strip().lower()
+            if len(row) < width:
+                continue
+            cid = row[cid_i].strip()
+            label = row[lbl_i].strip().lower()
             if cid and label:
-                out.append((cid, label))
-    return out
+                yield cid, label
 
 
-def median_of_sorted(vals: list[int]) -> float:
-    if not vals:
-        return float("nan")
-    n = len(vals)
+def summarize(vals: np.ndarray) -> tuple[int, float, int]:
+    """(min, median, max) from one np.partition pass (O(N) selection, no full sort)."""
+    n = vals.size
     mid = n // 2
-    return (vals[mid] + vals[mid - 1]) / 2 if n % 2 == 0 else float(vals[mid])
+    if n % 2 == 0:
+        p = np.partition(vals, [0, mid - 1, mid, n - 1])
+        med = 0.5 * (float(p[mid - 1]) + float(p[mid]))
+    else:
+        p = np.partition(vals, [0, mid, n - 1])
+        med = float(p[mid])
+    return int(p[0]), med, int(p[-1])
 
 
 def main() -> None:
@@ -74,34 +91,38 @@ def main() -> None:
         print(f"Mapping not found: {args.mapping}")
         return
 
-    clip_to_db, clip_to_category = load_mapping_with_category(args.mapping)
-    all_responses = []
+    clip_info = load_mapping_with_category(args.mapping)
+
+    # Per category: label -> list of dB values. Only (category, label) pairs that
+    # get reported have a bucket, so each response is one lookup + append.
+    by_category: dict[str, dict[str, list[int]]] = {
+        cat: {lbl: [] for lbl in LABELS} for cat in CATEGORIES
+    }
+    buckets = {
+        (cat, lbl): vals for cat, per_label in by_category.items() for lbl, vals in per_label.items()
+    }
+
+    # Stream each responses CSV straight into the buckets (no all-rows list)
+    get_info = clip_info.get
+    get_bucket = buckets.get
+    n_responses = 0
     for path in args.responses:
         if not path.exists():
             print(f"Skip missing: {path}")
             continue
-        all_responses.extend(load_responses(path))
+        for clip_id, label in load_responses(path):
+            n_responses += 1
+            info = get_info(clip_id)
+            if info is None:
+                continue
+            bucket = get_bucket((info[0], label))
+            if bucket is not None:
+                bucket.append(info[1])
 
-    if not all_responses:
+    if not n_responses:
         print("No response rows found.")
         return
 
-    # Per category: label -> list of dB values
-    by_category: dict[str, dict[str, list[int]]] = {}
-    for cat in CATEGORIES:
-        by_category[cat] = {lbl: [] for lbl in LABELS}
-
-    for clip_id, label in all_responses:
-        if clip_id not in clip_to_db or clip_id not in clip_to_category:
-            continue
-        cat = clip_to_category[clip_id]
-        db = clip_to_db[clip_id]
-        if cat not in by_category:
-            by_category[cat] = {lbl: [] for lbl in LABELS}
-        if label not in by_category[cat]:
-            by_category[cat][label] = []
-        by_category[cat][label].append(db)
-
     # Compute median per category per label; print and build output
     per_category_medians: dict[str, dict[str, float]] = {}
     for cat in CATEGORIES:
@@ -110,14 +131,15 @@ def main() -> None:
         print("Label       Count   Median(dB)   Min(dB)   Max(dB)")
         print("-" * 50)
         for lbl in LABELS:
-            vals = sorted(by_category[cat].get(lbl, []))
-            if not vals:
+            bucket = by_category[cat].get(lbl, [])
+            if not bucket:
                 print(f"{lbl:12}      0       -           -         -")
                 per_category_medians[cat][lbl] = None
                 continue
-            med = median_of_sorted(vals)
+            vals = np.fromiter(bucket, dtype=np.int32, count=len(bucket))
+            lo, med, hi = summarize(vals)
             per_category_medians[cat][lbl] = med
-            print(f"{lbl:12}  {len(vals):5}   {med:8.1f}   {min(vals):6}   {max(vals):6}")
+            print(f"{lbl:12}  {vals.size:5}   {med:8.1f}   {lo:6}   {hi:6}")
         print(f"  -> Voice simulator: very_low={per_category_medians[cat].get('very_low')}, low={per_category_medians[cat].get('low')}, medium={per_category_medians[cat].get('medium')}, high={per_category_medians[cat].get('high')}, very_high={per_category_medians[cat].get('very_high')} dB")
 
     if args.output:
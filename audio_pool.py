@@ -0,0 +1,43 @@
+"""
+Reusable float32 scratch buffers for the survey app's load/mix/encode path.
+Buffers are bucketed by power-of-two sample counts; acquire() returns a 1-D view
+of exactly the requested length and release() hands it back for reuse.
+Only pass buffers to release() once nothing else references them.
+"""
+import threading
+
+import numpy as np
+
+MAX_PER_BUCKET = 4  # bound idle memory per size bucket
+
+_lock = threading.Lock()
+_free: dict[int, list[np.ndarray]] = {}
+
+
+def _bucket_size(nsamples: int) -> int:
+    return 1 << max(nsamples - 1, 0).bit_length()
+
+
+def acquire(nsamples: int) -> np.ndarray:
+    """Return an uninitialized float32 array of nsamples, reusing a pooled buffer if free."""
+    size = _bucket_size(nsamples)
+    with _lock:
+        stack = _free.get(size)
+        base = stack.pop() if stack else None
+    if base is None:
+        base = np.empty(size, dtype=np.float32)
+    return base[:nsamples]
+
+
+def release(arr: np.ndarray) -> None:
+    """Return a buffer obtained from acquire() (or a view of it) to the pool."""
+    base = arr if arr.base is None else arr.base
+    if not isinstance(base, np.ndarray) or base.dtype != np.float32 or base.ndim != 1:
+        return
+    size = base.size
+    if size != _bucket_size(size):
+        return
+    with _lock:
+        stack = _free.setdefault(size, [])
+        if len(stack) < MAX_PER_BUCKET and not any(b is base for b in stack):
+            stack.append(base)
@@ -4,20 +4,24 @@ Copy selected level-normalized clips into levels/ with anonymized names
 (clip_id, category, sample_id, level_db). Keep survey_mapping.csv private.
 """
 import csv
-import re
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from config import ROOT_DIR, CATEGORIES, LEVELS_DIR, SURVEY_MAPPING_CSV
 
-# Pattern for level files: office_01_level_-40db.wav
-LEVEL_FILE_PATTERN = re.compile(r"^(.+)_(\d+)_level_(-?\d+)db\.wav$", re.IGNORECASE)
+COPY_WORKERS = 8
 
 
 def category_key(name: str) -> str:
     return name[0].lower() + name[1:] if name else name
 
 
+# Lowercased filename prefix per category, computed once for the directory scan
+_CAT_KEY_LOWERS = {c: category_key(c).lower() for c in CATEGORIES}
+
+
 def collect_level_files() -> list[tuple[Path, str, str, int]]:
     """Collect (path, category, sample_id, level_db) for each level file in category dirs."""
     out = []
@@ -25,24 +29,24 @@ def collect_level_files() -> list[tuple[Path, str, str, int]]:
         cat_dir = ROOT_DIR / category
         if not cat_dir.exists():
             continue
-        ckey = category_key(category)
-        prefix = f"{ckey}_"
-        for path in sorted(cat_dir.glob("*_level_*db.wav")):
-            stem = path.stem
-            m = LEVEL_FILE_PATTERN.match(stem)
-            if m:
-                cat_prefix, sample_id, level_str = m.group(1), m.group(2), m.group(3)
-                if cat_prefix.lower() == ckey.lower():
-                    out.append((path, category, f"{int(sample_id):02d}", int(level_str)))
-            elif stem.startswith(prefix) and "_level_" in stem:
-                # Fallback: parse "office_01_level_-40db"
-                rest = stem[len(prefix):]
-                if "_level_" in rest:
-                    sample_id_part, level_part = rest.split("_level_", 1)
-                    if level_part.endswith("db"):
-                        level_db = int(level_part[:-2])
-                        sample_id = f"{int(sample_id_part):02d}" if sample_id_part.isdigit() else sample_id_part
-                        out.append((path, category, sample_id, level_db))
+        ckey_lower = _CAT_KEY_LOWERS[category]
+        with os.scandir(cat_dir) as it:
+            entries = [e for e in it if e.name.endswith("db.wav") and "_level_" in e.name and e.is_file()]
+        for entry in entries:
+            # Parse stems like "office_01_level_-40db" with plain string splits
+            head, _, level_part = entry.name[:-4].rpartition("_level_")
+            if not head or not level_part.endswith("db"):
+                continue
+            try:
+                level_db = int(level_part[:-2])
+            except ValueError:
+                continue
+            cat_prefix, _, sample_id = head.rpartition("_")
+            if cat_prefix.lower() != ckey_lower:
+                continue
+            if sample_id.isdigit():
+                sample_id = f"{int(sample_id):02d}"
+            out.append((Path(entry.path), category, sample_id, level_db))
     return sorted(out, key=lambda x: (x[1], x[2], x[3]))
 
 
@@ -54,16 +58,21 @@ def main() -> None:
 
     LEVELS_DIR.mkdir(parents=True, exist_ok=True)
     rows = []
-    for idx, (path, category, sample_id, level_db) in enumerate(level_files, start=1):
-        clip_id = f"clip_{idx:04d}"
-        dest = LEVELS_DIR / f"{clip_id}.wav"
-        shutil.copy2(path, dest)
-        rows.append({
-            "clip_id": clip_id,
-            "category": category,
-            "sample_id": sample_id,
-            "level_db": level_db,
-        })
+    # Copies are IO-bound and independent, so overlap them in a thread pool
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as ex:
+        futures = []
+        for idx, (path, category, sample_id, level_db) in enumerate(level_files, start=1):
+            clip_id = f"clip_{idx:04d}"
+            dest = LEVELS_DIR / f"{clip_id}.wav"
+            futures.append(ex.submit(shutil.copy2, path, dest))
+            rows.append({
+                "clip_id": clip_id,
+                "category": category,
+                "sample_id": sample_id,
+                "level_db": level_db,
+            })
+        for fut in futures:
+            fut.result()
     print(f"Copied {len(rows)} clips to {LEVELS_DIR}.")
 
     with open(SURVEY_MAPPING_CSV, "w", newline="") as f:
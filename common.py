@@ -0,0 +1,53 @@
+"""
+Helpers shared by the pipeline scripts and survey_app.py: block-wise mono decoding,
+the cached resample_poly anti-aliasing filter, mean square level and minimal CSV field quoting.
+"""
+from functools import lru_cache
+
+import numpy as np
+import soundfile as sf
+
+KAISER_BETA = 5.0  # resample_poly's default anti-aliasing window
+BLOCK_FRAMES = 65536  # decode block size; keeps the multichannel working set small
+
+
+@lru_cache(maxsize=None)
+def polyphase_filter(up: int, down: int) -> np.ndarray:
+    """Kaiser-windowed low-pass FIR for resample_poly, designed once per ratio."""
+    from scipy.signal import firwin  # only needed (and only required) when resampling with scipy
+
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", KAISER_BETA))
+    return h.astype(np.float32)
+
+
+def decode_mono(f: sf.SoundFile, out: np.ndarray) -> np.ndarray:
+    """Decode f block by block, downmixing each block into out (float32, f.frames long)."""
+    block_buf = np.empty((BLOCK_FRAMES, f.channels), dtype=np.float32)
+    pos = 0
+    for block in f.blocks(dtype="float32", always_2d=True, out=block_buf):
+        n = min(len(block), out.size - pos)
+        if f.channels == 1:
+            out[pos : pos + n] = block[:n, 0]
+        else:
+            np.mean(block[:n], axis=1, dtype=np.float32, out=out[pos : pos + n])
+        pos += n
+        if pos >= out.size:
+            break
+    return out[:pos]
+
+
+def mean_square(audio: np.ndarray) -> float:
+    """Mean of squared samples (0.0 if empty)."""
+    if not audio.size:
+        return 0.0
+    # Sum of squares as one BLAS dot product (SIMD, no temporaries)
+    return float(np.dot(audio, audio)) / audio.size
+
+
+def csv_field(value: str) -> str:
+    """Quote a CSV field the way csv.writer does (QUOTE_MINIMAL), only when needed."""
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
@@ -1,4 +1,5 @@
 """Configuration: categories, paths, sample rate, level range, max duration."""
+from functools import lru_cache
 from pathlib import Path
 
 # Root directory (shivani/BackgroundNoise)
@@ -11,6 +12,7 @@ COLLECTED_RESPONSES_CSV = ROOT_DIR / "collected_responses.csv"
 CLIPPED_SAMPLES_DIR = ROOT_DIR / "clipped_samples"
 CLEAN_AUDIO_PATH = CLIPPED_SAMPLES_DIR / "voicebooking-speech.wav"
 CLEAN_SPEECH_LEVEL_DB = -25  # Reference level for clean speech when mixing
+SURVEY_CACHE_DIR = ROOT_DIR / "survey_cache"  # Pre-rendered survey_app clips (noise-only and mixed)
 
 # Categories: 5 samples each
 CATEGORIES = [
@@ -36,3 +38,19 @@ LEVELS_DB = list(range(LEVEL_DB_MIN, LEVEL_DB_MAX + 1, LEVEL_DB_STEP))
 
 SAMPLES_PER_CATEGORY = 5
 AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg")
+
+
+@lru_cache(maxsize=1)
+def get_clean_audio(mtime: float):
+    """Decode CLEAN_AUDIO_PATH once per file version. Returns (mono float32 audio, sr).
+
+    mtime (CLEAN_AUDIO_PATH's st_mtime) is only the cache key, so a replaced file is decoded
+    again. The array is shared by all callers and marked read-only.
+    """
+    import soundfile as sf
+
+    audio, sr = sf.read(CLEAN_AUDIO_PATH, dtype="float32", always_2d=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype="float32")
+    audio.flags.writeable = False
+    return audio, sr
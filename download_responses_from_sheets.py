@@ -7,14 +7,40 @@ Usage:
 """
 import argparse
 import csv
+import json
 from pathlib import Path
 
 import gspread
 from google.oauth2.service_account import Credentials
 
 
-def download_responses(credentials_json: Path, sheet_url: str, output_path: Path) -> None:
-    """Download all responses from Google Sheets to a CSV file."""
+def cache_meta_path(output_path: Path) -> Path:
+    """Sidecar recording which sheet version output_path was downloaded from."""
+    return output_path.with_name(output_path.name + ".meta.json")
+
+
+def sheet_last_update_time(spreadsheet) -> str | None:
+    """Drive modifiedTime of the spreadsheet (gspread 6 method, gspread 5 property)."""
+    getter = getattr(spreadsheet, "get_lastUpdateTime", None)
+    if getter is not None:
+        return getter()
+    return getattr(spreadsheet, "lastUpdateTime", None)
+
+
+def download_responses(
+    credentials_json: Path,
+    sheet_url: str,
+    output_path: Path,
+    force: bool = False,
+    with_respondent_id: bool = False,
+) -> None:
+    """Download all responses from Google Sheets to a CSV file.
+
+    Writes only clip_id and label (all aggregate_survey_responses.py reads)
+    unless with_respondent_id is set. Skips the download if output_path was
+    written from the same sheet revision (compared via the Drive last-update
+    time) with the same columns, unless force is set.
+    """
     
     # Define the scope
     scopes = [
@@ -32,30 +58,53 @@ def download_responses(credentials_json: Path, sheet_url: str, output_path: Path
     client = gspread.authorize(credentials)
     spreadsheet = client.open_by_url(sheet_url)
     worksheet = spreadsheet.sheet1
+
+    fieldnames = ["clip_id", "label"]
+    if with_respondent_id:
+        fieldnames.insert(0, "respondent_id")
+
+    # Reuse the previous download if the sheet has not changed since
+    meta_path = cache_meta_path(output_path)
+    try:
+        last_update = sheet_last_update_time(spreadsheet)
+    except Exception:
+        last_update = None
+    meta = {"sheet_url": sheet_url, "last_update_time": last_update, "columns": fieldnames}
+    if not force and last_update and output_path.exists() and meta_path.exists():
+        try:
+            cached = json.loads(meta_path.read_text())
+        except ValueError:
+            cached = None
+        if cached == meta:
+            print(f"Sheet unchanged since last download ({last_update}); using {output_path}")
+            print("Pass --force to download again.")
+            return
     
-    # Get all data
-    all_data = worksheet.get_all_records()
+    # Get all data in one bulk request as a list of rows (no per-row dicts)
+    values = worksheet.get_all_values()
     
-    if not all_data:
+    if len(values) < 2:
         print("No data found in the sheet.")
         return
+    header, rows = values[0], values[1:]
     
     # Write to CSV in the format expected by aggregate_survey_responses.py
-    # Required columns: respondent_id, clip_id, label
+    # Required columns: clip_id, label
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    col_idx = [header.index(c) if c in header else None for c in fieldnames]
     
     with open(output_path, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["respondent_id", "clip_id", "label"])
-        writer.writeheader()
-        
-        for row in all_data:
-            writer.writerow({
-                "respondent_id": row.get("respondent_id", ""),
-                "clip_id": row.get("clip_id", ""),
-                "label": row.get("label", "")
-            })
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(
+            [row[i] if i is not None and i < len(row) else "" for i in col_idx]
+            for row in rows
+        )
     
-    print(f"Downloaded {len(all_data)} responses to {output_path}")
+    if last_update:
+        meta_path.write_text(json.dumps(meta, indent=2))
+
+    print(f"Downloaded {len(rows)} responses to {output_path}")
     print(f"\nYou can now run:")
     print(f"python aggregate_survey_responses.py {output_path}")
 
@@ -82,6 +131,16 @@ def main():
         default=Path("collected_responses.csv"),
         help="Output CSV file path (default: collected_responses.csv)"
     )
+    parser.add_argument(
+        "--respondent-id",
+        action="store_true",
+        help="Also write the respondent_id column (not needed for aggregation)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Download even if the sheet is unchanged since the last download"
+    )
     
     args = parser.parse_args()
     
@@ -92,7 +151,13 @@ def main():
         return
     
     try:
-        download_responses(args.credentials, args.sheet_url, args.output)
+        download_responses(
+            args.credentials,
+            args.sheet_url,
+            args.output,
+            force=args.force,
+            with_respondent_id=args.respondent_id,
+        )
     except Exception as e:
         print(f"Error downloading responses: {e}")
         print("\nMake sure:")
@@ -6,9 +6,13 @@ prints instructions for manual download or URL manifest (Option B/C).
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import ROOT_DIR, RAW_DIR, CATEGORIES, SAMPLES_PER_CATEGORY
 
@@ -33,6 +37,20 @@ FREESOUND_SOUND_URL = "https://freesound.org/apiv2/sounds/{id}/"
 # Prefer duration <= 10 s; if too few results, we retry with no duration filter
 DURATION_FILTER = "duration:[0 TO 10]"
 FIELDS = "id,name,previews,license,username,duration"
+# Concurrent preview downloads; kept small to stay within Freesound rate limits
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # previews are a few MB at most; fewer, larger writes
+
+# One keep-alive session for all API and preview requests (avoids a TCP+TLS handshake per call)
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+    ),
+)
 
 
 def get_api_key() -> str | None:
@@ -53,12 +71,23 @@ def search_sounds(token: str, query: str, duration_filter: str | None, max_resul
     }
     if duration_filter:
         params["filter"] = duration_filter
-    r = requests.get(FREESOUND_SEARCH_URL, params=params, timeout=30)
+    r = SESSION.get(FREESOUND_SEARCH_URL, params=params, timeout=30)
     r.raise_for_status()
     data = r.json()
     return data.get("results", [])
 
 
+def attribution_entry(category: str, file_name: str, sound: dict) -> dict:
+    return {
+        "category": category,
+        "file": file_name,
+        "freesound_id": sound.get("id"),
+        "name": sound.get("name"),
+        "username": sound.get("username"),
+        "license": sound.get("license"),
+    }
+
+
 def get_preview_url(sound: dict) -> str | None:
     """Best available preview URL (prefer HQ MP3)."""
     previews = sound.get("previews") or {}
@@ -66,12 +95,14 @@ def get_preview_url(sound: dict) -> str | None:
 
 
 def download_file(url: str, path: Path, token: str) -> bool:
-    r = requests.get(url, params={"token": token} if "freesound" in url else None, timeout=60, stream=True)
-    r.raise_for_status()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "wb") as f:
-        for chunk in r.iter_content(chunk_size=8192):
-            f.write(chunk)
+    params = {"token": token} if "freesound" in url else None
+    # Context manager releases the streamed connection back to the session pool
+    with SESSION.get(url, params=params, timeout=60, stream=True) as r:
+        r.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
     return True
 
 
@@ -88,65 +119,57 @@ def main() -> None:
         return
 
     attribution = []
-    for category in CATEGORIES:
-        raw_cat = RAW_DIR / category
-        raw_cat.mkdir(parents=True, exist_ok=True)
-        query = CATEGORY_QUERIES.get(category, category.lower())
-        # Prefer short clips first; relax duration if too few, then try fallback queries
-        results = search_sounds(token, query, DURATION_FILTER, max_results=SAMPLES_PER_CATEGORY + 5)
-        if len(results) < SAMPLES_PER_CATEGORY:
-            results = search_sounds(token, query, None, max_results=SAMPLES_PER_CATEGORY + 5)
-        if len(results) < SAMPLES_PER_CATEGORY and category in CATEGORY_QUERIES_FALLBACK:
-            for fallback_query in CATEGORY_QUERIES_FALLBACK[category]:
-                if len(results) >= SAMPLES_PER_CATEGORY:
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        for category in CATEGORIES:
+            raw_cat = RAW_DIR / category
+            raw_cat.mkdir(parents=True, exist_ok=True)
+            query = CATEGORY_QUERIES.get(category, category.lower())
+            # Prefer short clips first; relax duration if too few, then try fallback queries
+            results = search_sounds(token, query, DURATION_FILTER, max_results=SAMPLES_PER_CATEGORY + 5)
+            if len(results) < SAMPLES_PER_CATEGORY:
+                results = search_sounds(token, query, None, max_results=SAMPLES_PER_CATEGORY + 5)
+            if len(results) < SAMPLES_PER_CATEGORY and category in CATEGORY_QUERIES_FALLBACK:
+                for fallback_query in CATEGORY_QUERIES_FALLBACK[category]:
+                    if len(results) >= SAMPLES_PER_CATEGORY:
+                        break
+                    more = search_sounds(token, fallback_query, None, max_results=SAMPLES_PER_CATEGORY + 5)
+                    # Merge, dedupe by id, keep order
+                    seen = {s["id"] for s in results}
+                    for s in more:
+                        if s["id"] not in seen:
+                            results.append(s)
+                            seen.add(s["id"])
+                    time.sleep(0.3)
+            # Fill file slots 01..N from the candidates, downloading each batch concurrently;
+            # slots whose download failed are retried with the next candidates.
+            candidates = (s for s in results if get_preview_url(s))
+            got: dict[int, dict] = {}
+            free_slots = list(range(1, SAMPLES_PER_CATEGORY + 1))
+            while free_slots:
+                batch = list(zip(free_slots, islice(candidates, len(free_slots))))
+                if not batch:
                     break
-                more = search_sounds(token, fallback_query, None, max_results=SAMPLES_PER_CATEGORY + 5)
-                # Merge, dedupe by id, keep order
-                seen = {s["id"] for s in results}
-                for s in more:
-                    if s["id"] not in seen:
-                        results.append(s)
-                        seen.add(s["id"])
-                time.sleep(0.3)
-        collected = 0
-        for s in results:
-            if collected >= SAMPLES_PER_CATEGORY:
-                break
-            preview = get_preview_url(s)
-            if not preview:
-                continue
-            idx = collected + 1
-            ext = ".mp3"
-            out_name = f"{category}_{idx:02d}{ext}"
-            out_path = raw_cat / out_name
-            if out_path.exists():
-                collected += 1
-                attribution.append({
-                    "category": category,
-                    "file": out_name,
-                    "freesound_id": s.get("id"),
-                    "name": s.get("name"),
-                    "username": s.get("username"),
-                    "license": s.get("license"),
-                })
-                continue
-            try:
-                download_file(preview, out_path, token)
-                attribution.append({
-                    "category": category,
-                    "file": out_name,
-                    "freesound_id": s.get("id"),
-                    "name": s.get("name"),
-                    "username": s.get("username"),
-                    "license": s.get("license"),
-                })
-                collected += 1
-                print(f"  {category}: {out_name} (id={s.get('id')})")
-            except Exception as e:
-                print(f"  Skip {s.get('id')}: {e}")
-            time.sleep(0.5)
-        if collected < SAMPLES_PER_CATEGORY:
-            print(f"  Warning: {category} has {collected} files (wanted {SAMPLES_PER_CATEGORY})")
+                jobs = {}
+                for idx, s in batch:
+                    out_name = f"{category}_{idx:02d}.mp3"
+                    out_path = raw_cat / out_name
+                    if out_path.exists():
+                        got[idx] = attribution_entry(category, out_name, s)
+                        continue
+                    jobs[pool.submit(download_file, get_preview_url(s), out_path, token)] = (idx, out_name, s)
+                for fut, (idx, out_name, s) in jobs.items():
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        print(f"  Skip {s.get('id')}: {e}")
+                        continue
+                    got[idx] = attribution_entry(category, out_name, s)
+                    print(f"  {category}: {out_name} (id={s.get('id')})")
+                free_slots = [idx for idx in free_slots if idx not in got]
+            attribution.extend(got[idx] for idx in sorted(got))
+            collected = len(got)
+            if collected < SAMPLES_PER_CATEGORY:
+                print(f"  Warning: {category} has {collected} files (wanted {SAMPLES_PER_CATEGORY})")
 
     out_attribution = ROOT_DIR / "attribution.json"
     with open(out_attribution, "w") as f:
@@ -4,11 +4,15 @@ per original file at -40, -35, -30, -25, -20, -15, -10 dB, save as
 {category}_{sample_id}_level_{db}db.wav. Avoid clipping (peak-limit if needed).
 """
 import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import numpy as np
 import soundfile as sf
 
+from common import mean_square
 from config import (
     ROOT_DIR,
     CATEGORIES,
@@ -22,34 +26,43 @@ CLIP_THRESHOLD = 0.99
 
 
 def load_audio(path: Path) -> np.ndarray:
-    """Load mono audio as float64."""
-    audio, _ = sf.read(path)
+    """Load mono audio as float32."""
+    audio, _ = sf.read(path, dtype="float32")
     if audio.ndim > 1:
-        audio = audio.mean(axis=1)
-    return audio.astype(np.float64)
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return audio
 
 
 def rms(audio: np.ndarray) -> float:
-    return float((audio ** 2).mean() ** 0.5)
+    return float(np.sqrt(mean_square(audio)))
 
 
-def normalize_to_level_db(audio: np.ndarray, target_db: float) -> np.ndarray:
-    """Scale audio so its RMS equals 10^(target_db/20). Peak-limit to avoid clipping."""
+def level_scales(audio: np.ndarray, levels_db: list[int]) -> np.ndarray | None:
+    """Gain per target level so RMS equals 10^(db/20). None if audio is silent."""
     current_rms = rms(audio)
     if current_rms <= 0:
-        return audio
-    target_rms = 10 ** (target_db / 20)
-    scale = target_rms / (current_rms + EPS)
-    out = audio * scale
-    if np.any(np.abs(out) > CLIP_THRESHOLD):
-        out = out / (np.max(np.abs(out)) / CLIP_THRESHOLD)
-    return out.astype(np.float32)
+        return None
+    target_rms = 10 ** (np.asarray(levels_db, dtype=np.float64) / 20)
+    return target_rms / (current_rms + EPS)
+
+
+def normalize_to_level_db(audio: np.ndarray, scale: float, out: np.ndarray) -> np.ndarray:
+    """Write audio * scale into out (float32). Peak-limit to avoid clipping."""
+    np.multiply(audio, scale, out=out, casting="unsafe")
+    if out.size:
+        peak = max(float(out.max()), -float(out.min()))
+        if peak > CLIP_THRESHOLD:
+            out *= CLIP_THRESHOLD / peak
+    return out
 
 
 def category_key(name: str) -> str:
     return name[0].lower() + name[1:] if name else name
 
 
+_CAT_KEYS = {c: category_key(c) for c in CATEGORIES}
+
+
 def get_manifest_rows() -> list[dict]:
     """Read manifest_original.csv. If missing, build from category dirs."""
     if MANIFEST_ORIGINAL_CSV.exists():
@@ -61,7 +74,7 @@ def get_manifest_rows() -> list[dict]:
         cat_dir = ROOT_DIR / category
         if not cat_dir.exists():
             continue
-        ckey = category_key(category)
+        ckey = _CAT_KEYS[category]
         # Only consider base files like office_01.wav, not level_* variants
         for path in sorted(cat_dir.glob("*.wav")):
             if "_level_" in path.stem:
@@ -82,30 +95,38 @@ def get_manifest_rows() -> list[dict]:
     return rows
 
 
+def process_one(row: dict, levels_db: list[int]) -> str:
+    """Write all level variants for one manifest row. Returns a progress line."""
+    path = Path(row["path"])
+    if not path.exists():
+        return f"Skip missing: {path}"
+    category = row["category"]
+    sample_id = row["sample_id"]
+    ckey = _CAT_KEYS.get(category) or category_key(category)
+    out_dir = ROOT_DIR / category
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    audio = load_audio(path)
+    scales = level_scales(audio, levels_db)
+    buf = np.empty_like(audio, dtype=np.float32)
+    for i, target_db in enumerate(levels_db):
+        out_audio = audio if scales is None else normalize_to_level_db(audio, scales[i], buf)
+        out_name = f"{ckey}_{sample_id}_level_{target_db}db.wav"
+        out_path = out_dir / out_name
+        sf.write(out_path, out_audio, SAMPLE_RATE, subtype="PCM_16")
+    return f"  {category} {sample_id}: wrote {len(levels_db)} level files"
+
+
 def main() -> None:
     rows = get_manifest_rows()
     if not rows:
         print("No manifest rows. Run process_originals.py first or add files to raw/<Category>/.")
         return
 
-    for row in rows:
-        path = Path(row["path"])
-        if not path.exists():
-            print(f"Skip missing: {path}")
-            continue
-        category = row["category"]
-        sample_id = row["sample_id"]
-        ckey = category_key(category)
-        out_dir = ROOT_DIR / category
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        audio = load_audio(path)
-        for target_db in LEVELS_DB:
-            out_audio = normalize_to_level_db(audio, target_db)
-            out_name = f"{ckey}_{sample_id}_level_{target_db}db.wav"
-            out_path = out_dir / out_name
-            sf.write(out_path, out_audio, SAMPLE_RATE)
-        print(f"  {category} {sample_id}: wrote {len(LEVELS_DB)} level files")
+    # Files are independent and the work is CPU-bound numpy + encode, so use processes
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for msg in ex.map(process_one, rows, repeat(LEVELS_DB), chunksize=1):
+            print(msg)
 
     print("Done. Run build_survey_bundle.py to create levels/ and survey_mapping.csv.")
 
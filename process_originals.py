@@ -2,13 +2,17 @@
 Load samples from raw/<Category>/, compute original RMS dB, trim to max duration,
 resample to target SR, save into category dirs (Office/, Cafe/, ...), write manifest_original.csv.
 """
-import csv
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
 from pathlib import Path
 
 import numpy as np
 import soundfile as sf
-import librosa
+from scipy.signal import resample_poly
 
+from common import csv_field, decode_mono, mean_square, polyphase_filter
 from config import (
     ROOT_DIR,
     CATEGORIES,
@@ -23,29 +27,53 @@ from config import (
 EPS = np.finfo(float).eps
 
 
-def load_audio(path: Path, target_sr: int) -> tuple[np.ndarray, int, float]:
-    """Load audio, convert to mono, resample to target_sr. Returns (audio, sr, original_duration_sec)."""
-    audio, sr = sf.read(path)
-    if audio.ndim > 1:
-        audio = audio.mean(axis=1)
-    original_duration = len(audio) / sr
+def resample(audio: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """Polyphase resampling by the reduced integer ratio target_sr/sr."""
+    g = gcd(sr, target_sr)
+    up, down = target_sr // g, sr // g
+    return resample_poly(audio, up, down, window=polyphase_filter(up, down))
+
+
+def fir_tail_frames(sr: int, target_sr: int) -> int:
+    """Input frames past a cut point that the resampling filter still reads."""
+    if sr == target_sr:
+        return 0
+    g = gcd(sr, target_sr)
+    up, down = target_sr // g, sr // g
+    return -(-10 * max(up, down) // up) + 1
+
+
+def load_audio(path: Path, target_sr: int, max_sec: float | None = None) -> tuple[np.ndarray, int, float]:
+    """Load audio as float32, convert to mono, resample to target_sr. Returns (audio, sr, original_duration_sec).
+
+    With max_sec, only the frames needed for the first max_sec seconds (plus the
+    resampling filter tail) are decoded and resampled, and the result is trimmed.
+    """
+    with sf.SoundFile(path) as f:
+        sr = f.samplerate
+        original_duration = f.frames / sr
+        frames = f.frames
+        if max_sec is not None:
+            frames = min(frames, math.ceil(max_sec * sr) + fir_tail_frames(sr, target_sr))
+        audio = decode_mono(f, np.empty(frames, dtype=np.float32))
     if sr != target_sr:
-        audio = librosa.resample(audio.astype(np.float64), orig_sr=sr, target_sr=target_sr)
-    return audio.astype(np.float64), target_sr, original_duration
+        audio = resample(audio, sr, target_sr)
+    if max_sec is not None:
+        audio = trim_to_max_duration(audio, target_sr, max_sec)
+    return audio, target_sr, original_duration
 
 
 def trim_to_max_duration(audio: np.ndarray, sr: int, max_sec: float) -> np.ndarray:
-    """Keep only the first max_sec seconds."""
+    """Keep only the first max_sec seconds (a view; leading slices of 1-D audio stay contiguous)."""
     n = int(sr * max_sec)
     if len(audio) <= n:
         return audio
-    return audio[:n].copy()
+    return audio[:n]
 
 
 def rms_dbfs(audio: np.ndarray) -> float:
     """RMS level in dB relative to full scale (dBFS)."""
-    rms = (audio.astype(np.float64) ** 2).mean() ** 0.5
-    return float(20 * np.log10(rms + EPS))
+    return float(20 * np.log10(np.sqrt(mean_square(audio)) + EPS))
 
 
 def category_key(name: str) -> str:
@@ -53,61 +81,75 @@ def category_key(name: str) -> str:
     return name[0].lower() + name[1:] if name else name
 
 
+def process_one(category: str, idx: int, path: Path) -> dict:
+    """Load, resample, trim, measure and write one raw file. Returns its manifest row."""
+    sample_id = f"{idx:02d}"
+    audio, sr, orig_dur = load_audio(path, SAMPLE_RATE, MAX_DURATION_SEC)
+    duration_sec = len(audio) / sr
+    db = rms_dbfs(audio)
+
+    out_name = f"{category_key(category)}_{sample_id}.wav"
+    out_path = ROOT_DIR / category / out_name
+    sf.write(out_path, audio, sr)
+
+    return {
+        "category": category,
+        "sample_id": sample_id,
+        "filename": out_name,
+        "original_rms_db": db,
+        "duration_sec": duration_sec,
+        "path": str(out_path),
+    }
+
+
 def main() -> None:
     for cat in CATEGORIES:
         (ROOT_DIR / cat).mkdir(parents=True, exist_ok=True)
 
-    rows: list[dict] = []
-    key = category_key
-
+    exts = tuple(e.lower() for e in AUDIO_EXTENSIONS)
+    jobs: list[tuple[str, int, Path]] = []
     for category in CATEGORIES:
         raw_cat = RAW_DIR / category
         if not raw_cat.exists():
             print(f"Skip {category}: no raw dir {raw_cat}")
             continue
 
-        files = []
-        for ext in AUDIO_EXTENSIONS:
-            files.extend(raw_cat.glob(f"*{ext}"))
-        files = sorted(files)[:SAMPLES_PER_CATEGORY]
+        # One directory pass for all extensions (glob hid dotfiles, so skip them here too)
+        with os.scandir(raw_cat) as it:
+            names = sorted(
+                entry.name for entry in it
+                if not entry.name.startswith(".")
+                and entry.name.lower().endswith(exts)
+                and entry.is_file()
+            )
+        files = [raw_cat / name for name in names[:SAMPLES_PER_CATEGORY]]
 
         if len(files) < SAMPLES_PER_CATEGORY:
             print(f"Warning: {category} has {len(files)} files (expected up to {SAMPLES_PER_CATEGORY})")
 
-        out_cat = ROOT_DIR / category
-        out_cat.mkdir(parents=True, exist_ok=True)
-        ckey = key(category)
+        jobs.extend((category, idx, path) for idx, path in enumerate(files, start=1))
 
-        for idx, path in enumerate(files, start=1):
-            sample_id = f"{idx:02d}"
+    # libsndfile decoding and scipy resampling run without the GIL, so a thread pool uses every core.
+    # Results are consumed in submission order, keeping the manifest order deterministic.
+    rows: list[dict] = []
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        futures = [(job, ex.submit(process_one, *job)) for job in jobs]
+        for (category, _, path), fut in futures:
             try:
-                audio, sr, orig_dur = load_audio(path, SAMPLE_RATE)
+                row = fut.result()
             except Exception as e:
-                print(f"Error loading {path}: {e}")
+                print(f"Error processing {path}: {e}")
                 continue
-
-            audio = trim_to_max_duration(audio, sr, MAX_DURATION_SEC)
-            duration_sec = len(audio) / sr
-            db = rms_dbfs(audio)
-
-            out_name = f"{ckey}_{sample_id}.wav"
-            out_path = out_cat / out_name
-            sf.write(out_path, audio, sr)
-
-            rows.append({
-                "category": category,
-                "sample_id": sample_id,
-                "filename": out_name,
-                "original_rms_db": round(db, 2),
-                "duration_sec": round(duration_sec, 2),
-                "path": str(out_path),
-            })
-            print(f"  {category} {sample_id}: {out_name}  original_rms_db={db:.2f}  duration_sec={duration_sec:.2f}")
-
-    with open(MANIFEST_ORIGINAL_CSV, "w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=["category", "sample_id", "filename", "original_rms_db", "duration_sec", "path"])
-        w.writeheader()
-        w.writerows(rows)
+            rows.append(row)
+            print(f"  {category} {row['sample_id']}: {row['filename']}  original_rms_db={row['original_rms_db']:.2f}  duration_sec={row['duration_sec']:.2f}")
+
+    # Format the whole manifest up front and write it in one call; the format spec does the rounding
+    lines = ["category,sample_id,filename,original_rms_db,duration_sec,path\n"]
+    lines.extend(
+        f"{r['category']},{r['sample_id']},{r['filename']},{r['original_rms_db']:.2f},{r['duration_sec']:.2f},{csv_field(r['path'])}\n"
+        for r in rows
+    )
+    Path(MANIFEST_ORIGINAL_CSV).write_text("".join(lines))
 
     print(f"Wrote {MANIFEST_ORIGINAL_CSV} ({len(rows)} rows).")
 
@@ -5,59 +5,193 @@ Uses clipped_samples/: category subdirs with noise files + voicebooking-speech.w
 Run: streamlit run survey_app.py --server.address 0.0.0.0
 """
 import csv
+import inspect
 import io
+import logging
+import os
+import struct
 import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from math import gcd
+from operator import attrgetter
 from pathlib import Path
 
 import numpy as np
 import soundfile as sf
 import streamlit as st
 
+try:
+    import soxr
+    HAS_SOXR = True
+except ImportError:
+    HAS_SOXR = False
+
+try:
+    from scipy.signal import resample_poly
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
 try:
     import librosa
     HAS_LIBROSA = True
 except ImportError:
     HAS_LIBROSA = False
 
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+import audio_pool
+from common import decode_mono, mean_square, polyphase_filter
 from config import (
     CLIPPED_SAMPLES_DIR,
     CLEAN_AUDIO_PATH,
     CLEAN_SPEECH_LEVEL_DB,
-    COLLECTED_RESPONSES_CSV,
+    SURVEY_CACHE_DIR,
+    get_clean_audio,
 )
 
 LABELS = ["very_low", "low", "medium", "high", "very_high"]
+LABEL_INDEX = {lab: i for i, lab in enumerate(LABELS)}
 AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac")
+AUDIO_EXTENSIONS_LOWER = tuple(e.lower() for e in AUDIO_EXTENSIONS)
 TARGET_SR = 16000
 EPS = np.finfo(float).eps
 NOISE_LEVELS_DB = [-10, -15, -20, -25, -30, -35, -40]  # -10 to -40 dB, step 5
 SAMPLES_PER_CATEGORY = 2
 CROSSFADE_SEC = 0.2  # fade-out / fade-in duration when looping short noise
+PCM16_FULL_SCALE = 32767.0  # float sample value that maps to int16 full scale
+AUDIO_CACHE_ENTRIES = 256  # rendered clips kept across reruns (every clip in both play modes)
+# Newer Streamlit can report whether an expander is open, so collapsed ones need not be rendered
+EXPANDER_TRACKS_OPEN = "on_change" in inspect.signature(st.expander).parameters
 
+logger = logging.getLogger(__name__)
 
-def load_mono(path: Path, sr: int = TARGET_SR) -> tuple[np.ndarray, int]:
-    """Load audio as mono float64, resampled to sr."""
-    audio, file_sr = sf.read(path)
-    if audio.ndim > 1:
-        audio = audio.mean(axis=1)
-    if HAS_LIBROSA and file_sr != sr:
-        audio = librosa.resample(audio.astype(np.float64), orig_sr=file_sr, target_sr=sr)
-    elif file_sr != sr:
-        audio = audio.astype(np.float64)
-    return audio.astype(np.float64), sr
+ClipRow = namedtuple("ClipRow", "category clip_id path filename level_db mtime sample_ix ver")
 
 
-def rms_dbfs(audio: np.ndarray) -> float:
-    rms = (audio.astype(np.float64) ** 2).mean() ** 0.5
-    return float(20 * np.log10(rms + EPS))
+def to_mono(audio: np.ndarray, file_sr: int, sr: int = TARGET_SR) -> tuple[np.ndarray, int]:
+    """Downmix decoded audio to mono float32, resampled to sr."""
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    if HAS_SOXR and file_sr != sr:
+        audio = soxr.resample(audio, file_sr, sr, quality="HQ")
+    elif HAS_SCIPY and file_sr != sr:
+        g = gcd(file_sr, sr)
+        up, down = sr // g, file_sr // g
+        audio = resample_poly(audio, up, down, window=polyphase_filter(up, down))
+    elif HAS_LIBROSA and file_sr != sr:
+        audio = librosa.resample(audio, orig_sr=file_sr, target_sr=sr)
+    return audio.astype(np.float32, copy=False), sr
 
 
-def normalize_to_db(audio: np.ndarray, target_db: float) -> np.ndarray:
-    rms = (audio.astype(np.float64) ** 2).mean() ** 0.5
+def load_mono(path: Path, sr: int = TARGET_SR) -> tuple[np.ndarray, int]:
+    """Load audio as mono float32, resampled to sr."""
+    with sf.SoundFile(path) as f:
+        file_sr = f.samplerate
+        needs_resample = file_sr != sr and (HAS_SOXR or HAS_SCIPY or HAS_LIBROSA)
+        # Pre-resample mono signal is scratch; otherwise it is the result itself
+        mono = audio_pool.acquire(f.frames) if needs_resample else np.empty(f.frames, dtype=np.float32)
+        audio = decode_mono(f, mono)
+    if not needs_resample:
+        return audio, sr
+    out, sr = to_mono(audio, file_sr, sr)
+    audio_pool.release(mono)
+    return out, sr
+
+
+def load_clean(mtime: float, sr: int = TARGET_SR) -> tuple[np.ndarray, int]:
+    """CLEAN_AUDIO_PATH as mono float32 at sr; the file is decoded only once per mtime."""
+    return to_mono(*get_clean_audio(mtime), sr)
+
+
+def level_gain(audio: np.ndarray, target_db: float) -> float:
+    """Gain that brings audio to target_db RMS (1.0 for silence)."""
+    rms = np.sqrt(mean_square(audio))
     if rms <= 0:
-        return audio
-    scale = 10 ** (target_db / 20) / (rms + EPS)
-    return (audio * scale).astype(np.float32)
+        return 1.0
+    return 10 ** (target_db / 20) / (rms + EPS)
+
+
+def wav_header(n_samples: int, sr: int) -> bytes:
+    """44-byte RIFF/WAVE header for n_samples of mono 16-bit PCM at sr."""
+    data_len = 2 * n_samples
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE",
+        b"fmt ", 16, 1, 1, sr, 2 * sr, 2, 16,
+        b"data", data_len,
+    )
+
+
+def wav_buffer(n_samples: int, sr: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    int16 array laid out as a complete mono PCM_16 WAV (header, then n_samples), and a view of
+    its sample data. Filling the view and calling tobytes() yields the file in one copy.
+    """
+    header = np.frombuffer(wav_header(n_samples, sr), dtype="<i2")
+    buf = np.empty(len(header) + n_samples, dtype="<i2")
+    buf[:len(header)] = header
+    return buf, buf[len(header):]
+
+
+def pcm16_wav_bytes(pcm: np.ndarray, sr: int) -> bytes:
+    """
+    Mono PCM_16 WAV bytes for float32 samples already in PCM units (full scale = PCM16_FULL_SCALE).
+    Callers fold PCM16_FULL_SCALE into their gain. Clips and rounds pcm in place, so pass scratch.
+    """
+    np.clip(pcm, -PCM16_FULL_SCALE, PCM16_FULL_SCALE, out=pcm)
+    np.rint(pcm, out=pcm)
+    # Cast straight into the WAV buffer: no int16 temporary and no header + data concatenation
+    buf, data = wav_buffer(len(pcm), sr)
+    np.copyto(data, pcm, casting="unsafe")
+    return buf.tobytes()
+
+
+@lru_cache(maxsize=None)
+def crossfade_windows(cf: int) -> tuple[np.ndarray, np.ndarray]:
+    """Equal-power (sin/cos) fade-in and fade-out of cf samples, built once per length (read-only)."""
+    theta = np.linspace(0.0, np.pi / 2, cf, dtype=np.float64)
+    fade_in = np.sin(theta).astype(np.float32)
+    fade_out = np.cos(theta).astype(np.float32)
+    fade_in.flags.writeable = False
+    fade_out.flags.writeable = False
+    return fade_in, fade_out
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True, fastmath=True)
+    def mix_to_pcm16(clean_pcm: np.ndarray, noise: np.ndarray, noise_gain: float, out: np.ndarray) -> None:
+        """out = int16(rint(clip(clean_pcm + noise * noise_gain, +-32767))) in one pass (PCM units)."""
+        for i in range(out.size):
+            v = clean_pcm[i] + noise[i] * noise_gain
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32767.0:
+                v = -32767.0
+            out[i] = np.int16(np.rint(v))
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up_kernels() -> None:
+    """
+    Call the optional native paths once on tiny inputs, with the same argument types as the real
+    calls, so numba's compile (or load from its on-disk cache) and soxr's library load happen at
+    startup rather than on the first clip a respondent plays.
+    """
+    if HAS_NUMBA:
+        # numba types read-only arrays separately; the cached clean speech is read-only
+        clean_pcm = np.zeros(16, dtype=np.float32)
+        clean_pcm.flags.writeable = False
+        mix_to_pcm16(clean_pcm, np.zeros(16, dtype=np.float32), 1.0, np.empty(16, dtype="<i2"))
+    if HAS_SOXR:
+        soxr.resample(np.zeros(480, dtype=np.float32), 48000, TARGET_SR, quality="HQ")
 
 
 def extend_noise_with_crossfade(
@@ -65,168 +199,254 @@ def extend_noise_with_crossfade(
 ) -> np.ndarray:
     """
     Loop noise to reach target_len. Uses 0.2s crossfade at each loop point:
-    last crossfade_sec of current block fades out while first crossfade_sec of
-    next block fades in, overlap-added to avoid clicks (industry standard).
+    last crossfade_sec of current copy fades out while first crossfade_sec of
+    next copy fades in, overlap-added to avoid clicks (industry standard).
+    Equal-power fades keep the RMS of uncorrelated noise steady across the seam.
     """
     n = len(noise)
     if n >= target_len:
-        return noise[:target_len].astype(np.float64)
+        return noise[:target_len].astype(np.float32)
+    if n == 0:
+        return np.zeros(target_len, dtype=np.float32)
     cf = int(crossfade_sec * sr)
     cf = min(cf, n // 2, max(1, (n - 1) // 2))  # need enough samples for crossfade
-    if cf < 1:
-        # Fallback: simple tile (may click)
-        repeats = (target_len // n) + 1
-        return np.tile(noise, repeats)[:target_len].astype(np.float64)
-
-    out = np.zeros(target_len, dtype=np.float64)
-    pos = 0
-    first = True
-    while pos < target_len:
-        if first:
-            # First block: add full noise
-            add_len = min(n, target_len)
-            out[pos : pos + add_len] = noise[:add_len]
-            pos += add_len
-            first = False
-        else:
-            # Overlap region: fade-out (from end of prev in-place) + fade-in (from start of noise)
-            # Prev block ends at pos; its tail is out[pos-cf:pos]
-            # We overwrite that region with crossfade: out[pos-cf:pos] * linspace(1,0) + noise[:cf] * linspace(0,1)
-            fade_out = np.linspace(1, 0, cf, dtype=np.float64)
-            fade_in = np.linspace(0, 1, cf, dtype=np.float64)
-            overlap_len = min(cf, target_len - (pos - cf))
-            if overlap_len <= 0:
-                break
-            prev_tail = out[pos - cf : pos - cf + overlap_len].copy()
-            next_head = noise[:overlap_len]
-            out[pos - cf : pos - cf + overlap_len] = prev_tail * fade_out[:overlap_len] + next_head * fade_in[:overlap_len]
-            pos = pos - cf + overlap_len
-            if pos >= target_len:
-                break
-            # Add rest of noise (non-overlap part)
-            rest_len = min(n - cf, target_len - pos)
-            if rest_len > 0:
-                out[pos : pos + rest_len] = noise[cf : cf + rest_len]
-                pos += rest_len
+    stride = n - cf  # copies start every stride samples
+    fade_in, fade_out = crossfade_windows(cf)
+
+    # After the first copy the output is periodic: one crossfaded seam (tail of the
+    # previous copy + head of the next) followed by the untouched body.
+    period = np.concatenate((noise[stride:] * fade_out + noise[:cf] * fade_in, noise[cf:stride]))
+    out = np.empty(target_len, dtype=np.float32)
+    out[:stride] = noise[:stride]
+    out[stride:] = np.resize(period, target_len - stride)
+    # The last copy has no successor, so its tail (if reached) is not faded out
+    n_copies = 1 + -(-(target_len - n) // stride)
+    tail_start = n_copies * stride
+    if tail_start < target_len:
+        out[tail_start:] = noise[stride : stride + target_len - tail_start]
     return out
 
 
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_clean_normalized(clean_mtime: float, clean_level_db: float) -> tuple[np.ndarray, int]:
+    """
+    Clean speech at TARGET_SR normalized to clean_level_db and expressed in PCM units
+    (x PCM16_FULL_SCALE), shared by every mix in the process (read-only).
+    clean_mtime is CLEAN_AUDIO_PATH's st_mtime and only keys the cache. No defaults: the cache
+    keys on the arguments as passed, so every caller must spell out the same ones.
+    """
+    clean, sr = load_clean(clean_mtime)
+    clean_pcm = (clean * (level_gain(clean, clean_level_db) * PCM16_FULL_SCALE)).astype(np.float32, copy=False)
+    clean_pcm.flags.writeable = False
+    return clean_pcm, sr
+
+
 def mix_clean_and_noise(
-    clean_path: Path,
+    clean_pcm: np.ndarray,
     noise_path: Path,
     noise_level_db: float,
     clean_level_db: float = CLEAN_SPEECH_LEVEL_DB,
+    sr: int = TARGET_SR,
 ) -> tuple[bytes, float]:
-    """Mix clean speech + noise at given noise level. Return (wav_bytes, snr_db)."""
-    clean, sr = load_mono(clean_path)
+    """
+    Mix normalized clean speech (at sr, PCM units as from load_clean_normalized) + noise at the
+    given noise level. Return (wav_bytes, snr_db).
+    """
     noise, _ = load_mono(noise_path, sr)
-    noise_norm = normalize_to_db(noise, noise_level_db)
+    n = len(clean_pcm)
+    # Both levels reduce to one gain per signal. Clean's is already applied (cached); the noise
+    # gain commutes with looping/cropping, so measure it on the raw noise and apply it, together
+    # with the PCM scale, in the single mix pass.
+    noise_gain = level_gain(noise, noise_level_db) * PCM16_FULL_SCALE
     # If noise is shorter than clean, loop it with crossfade
-    if len(noise_norm) < len(clean):
-        noise_norm = extend_noise_with_crossfade(noise_norm, len(clean), sr)
+    if len(noise) < n:
+        noise = extend_noise_with_crossfade(noise, n, sr)
     else:
-        noise_norm = noise_norm[: len(clean)]
-    clean_norm = normalize_to_db(clean, clean_level_db)
+        noise = noise[:n]
     # SNR = clean_level - noise_level (in dB)
     snr_db = clean_level_db - noise_level_db
-    mixed = clean_norm.astype(np.float64) + noise_norm.astype(np.float64)
-    mixed = np.clip(mixed, -1.0, 1.0).astype(np.float32)
-    buf = io.BytesIO()
-    sf.write(buf, mixed, sr, format="WAV")
-    buf.seek(0)
-    return buf.read(), snr_db
+    if HAS_NUMBA:
+        buf, pcm = wav_buffer(n, sr)
+        mix_to_pcm16(clean_pcm, noise, noise_gain, pcm)
+        return buf.tobytes(), snr_db
+    mixed = audio_pool.acquire(n)
+    try:
+        # Scale, add, clip and quantize in place in one float32 buffer (no float64 temporaries)
+        np.multiply(noise, noise_gain, out=mixed, casting="unsafe")
+        np.add(mixed, clean_pcm, out=mixed)
+        wav = pcm16_wav_bytes(mixed, sr)
+    finally:
+        audio_pool.release(mixed)
+    return wav, snr_db
+
+
+def render_mixed_wav(
+    noise_path: Path, noise_level_db: float, clean_mtime: float, clean_level_db: float = CLEAN_SPEECH_LEVEL_DB
+) -> bytes:
+    """WAV bytes of the shared normalized clean speech mixed with noise_path at noise_level_db."""
+    clean_pcm, sr = load_clean_normalized(clean_mtime, clean_level_db)
+    wav, _ = mix_clean_and_noise(clean_pcm, noise_path, noise_level_db, clean_level_db, sr)
+    return wav
+
+
+@st.cache_data(max_entries=AUDIO_CACHE_ENTRIES, show_spinner=False)
+def mixed_wav_bytes(
+    noise_path: str,
+    mtime: float,
+    noise_level_db: float,
+    clean_mtime: float,
+    clean_level_db: float = CLEAN_SPEECH_LEVEL_DB,
+) -> bytes:
+    """render_mixed_wav memoized per clip (path, mtime, level) and clean speech mtime across reruns."""
+    return render_mixed_wav(Path(noise_path), noise_level_db, clean_mtime, clean_level_db)
 
 
-def noise_to_wav_bytes(noise_path: Path, level_db: float) -> bytes:
+def render_noise_wav(noise_path: Path, level_db: float) -> bytes:
     """Load noise, normalize to level_db, return WAV bytes."""
     noise, sr = load_mono(noise_path)
-    noise_norm = normalize_to_db(noise, level_db)
-    buf = io.BytesIO()
-    sf.write(buf, noise_norm, sr, format="WAV")
-    buf.seek(0)
-    return buf.read()
+    noise_buf = audio_pool.acquire(len(noise))
+    try:
+        # Level and PCM scale in one multiply
+        gain = level_gain(noise, level_db) * PCM16_FULL_SCALE
+        np.multiply(noise, gain, out=noise_buf, casting="unsafe")
+        return pcm16_wav_bytes(noise_buf, sr)
+    finally:
+        audio_pool.release(noise_buf)
+
+
+@st.cache_data(max_entries=AUDIO_CACHE_ENTRIES, show_spinner=False)
+def noise_to_wav_bytes(noise_path: str, mtime: float, level_db: float) -> bytes:
+    """render_noise_wav memoized per (path, mtime, level) across reruns."""
+    return render_noise_wav(Path(noise_path), level_db)
 
 
-def scan_clipped_samples() -> list[dict]:
+def clipped_samples_mtime() -> float:
     """
-    Return list of {category, clip_id, path, filename, level_db} from clipped_samples.
+    Latest mtime of CLIPPED_SAMPLES_DIR, its category subdirs and their audio files; cache key
+    for the scan. Files count too: overwriting one in place leaves its directory's mtime alone,
+    and the scan records per-file mtimes that key the rendered-audio caches.
+    """
+    if not CLIPPED_SAMPLES_DIR.exists():
+        return 0.0
+    mtime = CLIPPED_SAMPLES_DIR.stat().st_mtime
+    with os.scandir(CLIPPED_SAMPLES_DIR) as it:
+        subdirs = [entry for entry in it if entry.is_dir()]
+    for subdir in subdirs:
+        mtime = max(mtime, subdir.stat().st_mtime)
+        with os.scandir(subdir.path) as it:
+            for entry in it:
+                if entry.name.lower().endswith(AUDIO_EXTENSIONS_LOWER):
+                    mtime = max(mtime, entry.stat().st_mtime)
+    return mtime
+
+
+@st.cache_data(show_spinner=False)
+def scan_clipped_samples(dir_mtime: float) -> dict[str, list[ClipRow]]:
+    """
+    Return {category: [ClipRow(category, clip_id, path, filename, level_db, mtime, sample_ix, ver), ...]}
+    from clipped_samples, categories sorted and only those with clips. sample_ix (0-based) and
+    ver (1-based) number the recording and its level variant for display.
     Uses only SAMPLES_PER_CATEGORY samples per category; each sample has NOISE_LEVELS_DB variants.
+    dir_mtime is only the cache key (see clipped_samples_mtime).
     """
     if not CLIPPED_SAMPLES_DIR.exists():
-        return []
-    rows = []
-    for subdir in sorted(CLIPPED_SAMPLES_DIR.iterdir()):
-        if not subdir.is_dir():
-            continue
-        category = subdir.name
-        all_paths = sorted(
-            p for p in subdir.iterdir()
-            if p.suffix.lower() in (e.lower() for e in AUDIO_EXTENSIONS)
-        )
+        return {}
+    with os.scandir(CLIPPED_SAMPLES_DIR) as it:
+        categories = sorted(entry.name for entry in it if entry.is_dir())
+    by_category = {}
+    for category in categories:
+        subdir = CLIPPED_SAMPLES_DIR / category
+        with os.scandir(subdir) as it:
+            all_names = sorted(
+                entry.name for entry in it
+                if entry.name.lower().endswith(AUDIO_EXTENSIONS_LOWER)
+            )
         # Use different second sample for kids_playing (skip the loud screaming one)
-        if category == "kids_playing" and len(all_paths) > 2:
-            paths = [all_paths[0], all_paths[2]]
+        if category == "kids_playing" and len(all_names) > 2:
+            names = [all_names[0], all_names[2]]
         else:
-            paths = all_paths[:SAMPLES_PER_CATEGORY]
-        for path in paths:
-            for level_db in NOISE_LEVELS_DB:
-                clip_id = f"{category}/{path.name}/{level_db}"
-                rows.append({
-                    "category": category,
-                    "clip_id": clip_id,
-                    "path": path,
-                    "filename": path.name,
-                    "level_db": level_db,
-                })
-    return rows
+            names = all_names[:SAMPLES_PER_CATEGORY]
+        if not names:
+            continue
+        rows = by_category[category] = []
+        for sample_ix, name in enumerate(names):
+            path = subdir / name
+            mtime = path.stat().st_mtime  # keys the rendered-audio caches
+            for ver, level_db in enumerate(NOISE_LEVELS_DB, start=1):
+                rows.append(ClipRow(
+                    category, f"{category}/{name}/{level_db}", path, name, level_db, mtime, sample_ix, ver,
+                ))
+    return by_category
 
 
-def get_categories(rows: list) -> list[str]:
-    return sorted({r["category"] for r in rows})
+def variant_path(row: ClipRow, mode: str) -> Path:
+    """Pre-rendered WAV for row in play mode "noise" or "mixed" under SURVEY_CACHE_DIR."""
+    suffix = f"mixed{CLEAN_SPEECH_LEVEL_DB}" if mode == "mixed" else mode
+    return SURVEY_CACHE_DIR / row.category / f"{row.filename}_{row.level_db}_{suffix}.wav"
 
 
-def get_clips_for_category(rows: list, category: str) -> list[dict]:
-    return [r for r in rows if r["category"] == category]
+def write_variant(row: ClipRow, mode: str, clean_mtime: float | None) -> str:
+    """
+    Render row's variant to disk unless a file newer than its sources exists. Returns its path.
+    clean_mtime is CLEAN_AUDIO_PATH's st_mtime, required for "mixed".
+    """
+    out = variant_path(row, mode)
+    source_mtime = max(row.mtime, clean_mtime) if mode == "mixed" else row.mtime
+    try:
+        if out.stat().st_mtime >= source_mtime:
+            return str(out)
+    except FileNotFoundError:
+        pass
+    if mode == "mixed":
+        # Clean speech is cached per clean_mtime, so this never mixes an older decode of the file
+        wav = render_mixed_wav(row.path, row.level_db, clean_mtime)
+    else:
+        wav = render_noise_wav(row.path, row.level_db)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent sessions never serve a half-written file
+    tmp = out.with_name(f"{out.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(wav)
+    os.replace(tmp, out)
+    return str(out)
 
 
-def append_responses_to_file(respondent_id: str, votes: dict, clip_rows: list) -> bool:
-    clip_lookup = {r["clip_id"]: r for r in clip_rows}
-    rows = []
-    for cid, label in votes.items():
-        if cid not in clip_lookup:
-            continue
-        r = clip_lookup[cid]
-        rows.append({
-            "respondent_id": respondent_id,
-            "clip_id": cid,
-            "label": label,
-            "category": r["category"],
-            "level_db": r["level_db"],
-        })
-    if not rows:
-        return False
-    path = Path(COLLECTED_RESPONSES_CSV)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        import fcntl
-        with open(path, "a", newline="") as f:
-            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+@st.cache_resource(show_spinner="Preparing clips...")
+def precompute_variants(dir_mtime: float, clean_mtime: float | None) -> dict[tuple[str, str], str]:
+    """
+    Render every clip (noise-only, and mixed if clean speech exists) into SURVEY_CACHE_DIR
+    once per process, reusing files newer than their sources. Returns {(clip_id, mode): path}.
+    clean_mtime is CLEAN_AUDIO_PATH's st_mtime, or None without clean speech.
+    Clips that fail to render or write are logged and left out; the render loop falls back
+    to in-memory bytes.
+    """
+    modes = ["noise"]
+    if clean_mtime is not None:
+        modes.append("mixed")
+        # Same arguments as render_mixed_wav, so the workers reuse this entry
+        load_clean_normalized(clean_mtime, CLEAN_SPEECH_LEVEL_DB)
+    rows = [row for category_rows in scan_clipped_samples(dir_mtime).values() for row in category_rows]
+    variants = {}
+    # Each job is mostly native work (decode, resample, the NumPy mix), so one thread per core
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        futures = [(row, mode, ex.submit(write_variant, row, mode, clean_mtime)) for row in rows for mode in modes]
+        for row, mode, fut in futures:
             try:
-                need_header = path.stat().st_size == 0
-                w = csv.DictWriter(f, fieldnames=["respondent_id", "clip_id", "label", "category", "level_db"])
-                if need_header:
-                    w.writeheader()
-                w.writerows(rows)
-            finally:
-                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-    except ImportError:
-        with open(path, "a", newline="") as f:
-            need_header = path.stat().st_size == 0
-            w = csv.DictWriter(f, fieldnames=["respondent_id", "clip_id", "label", "category", "level_db"])
-            if need_header:
-                w.writeheader()
-            w.writerows(rows)
-    return True
+                variants[row.clip_id, mode] = fut.result()
+            except Exception as e:
+                logger.warning("Could not pre-render %s: %s", variant_path(row, mode), e)
+    return variants
+
+
+def recording_panel(label: str, key: str, expanded: bool):
+    """
+    Expander for one recording and whether to render its contents. Where Streamlit tracks
+    expander state, collapsed panels report closed so the caller can skip their work;
+    otherwise every panel renders, as before.
+    """
+    if EXPANDER_TRACKS_OPEN:
+        panel = st.expander(label, expanded=expanded, key=key, on_change="rerun")
+        return panel, panel.open
+    return st.expander(label, expanded=expanded), True
 
 
 def main():
@@ -237,19 +457,20 @@ def main():
     if "votes" not in st.session_state:
         st.session_state["votes"] = {}
 
-    clip_rows = scan_clipped_samples()
-    if not clip_rows:
+    samples_mtime = clipped_samples_mtime()
+    clips_by_category = scan_clipped_samples(samples_mtime)
+    if not clips_by_category:
         st.error("No clips found in clipped_samples/. Add category subdirs with .wav/.mp3/.flac files.")
         return
-
-    categories = get_categories(clip_rows)
-    if not categories:
-        st.error("No categories found.")
-        return
+    categories = list(clips_by_category)
+    # Keys every clean-speech cache, so a replaced clean file is never mixed from a stale decode
+    clean_mtime = CLEAN_AUDIO_PATH.stat().st_mtime if CLEAN_AUDIO_PATH.exists() else None
+    warm_up_kernels()  # once per process; a no-op when neither numba nor soxr is installed
+    variants = precompute_variants(samples_mtime, clean_mtime)
 
     # --- Clean audio at top ---
     st.subheader("Reference clean speech (optional)")
-    if CLEAN_AUDIO_PATH.exists():
+    if clean_mtime is not None:
         st.audio(str(CLEAN_AUDIO_PATH))
     else:
         st.caption("voicebooking-speech.wav not found in clipped_samples/.")
@@ -258,70 +479,70 @@ def main():
     st.subheader("Noise clips by category")
 
     category = st.selectbox("Category", options=categories, key="category_select")
-    clips = get_clips_for_category(clip_rows, category)
+    clips = clips_by_category[category]
     st.caption(f"{len(clips)} clips in {category}.")
 
-    prev_sample = None
-    rec_idx = -1
-    clip_num = 0
-    for idx, row in enumerate(clips):
-        clip_id = row["clip_id"]
-        path = row["path"]
-        sample_key = f"{row['category']}/{row['filename']}"
-        if sample_key != prev_sample:
-            rec_idx += 1
-            clip_num = 1
-            prev_sample = sample_key
-        else:
-            clip_num += 1
-
-        rec_label = chr(ord("A") + rec_idx)
-        if not path.exists():
-            st.warning(f"Missing: {path}")
-            continue
-
-        st.markdown(f"**Recording {rec_label} — clip {clip_num}**")
-        play_mode = st.radio(
-            "Play",
-            options=["Noise only", "Mixed (noise + clean speech)"],
-            key=f"mode_{clip_id}",
-            horizontal=True,
+    votes = st.session_state["votes"]
+    # Clips come sample-major from the cached scan: one expander per recording (grouped on
+    # sample_ix, so the number of clips per recording does not matter), first one open.
+    # Collapsed recordings skip their audio and widgets entirely; their votes stay in session state.
+    # No per-clip exists() check: rows come from that scan, which is re-run whenever
+    # clipped_samples changes.
+    for sample_ix, sample_rows in groupby(clips, key=attrgetter("sample_ix")):
+        panel, is_open = recording_panel(
+            f"Recording {chr(ord('A') + sample_ix)}",
+            key=f"panel_{category}_{sample_ix}",
+            expanded=sample_ix == 0,
         )
-
-        if play_mode == "Noise only":
-            st.audio(noise_to_wav_bytes(path, row["level_db"]), format="audio/wav")
-        else:
-            if CLEAN_AUDIO_PATH.exists():
-                mixed_bytes, _ = mix_clean_and_noise(CLEAN_AUDIO_PATH, path, row["level_db"])
-                st.audio(mixed_bytes, format="audio/wav")
-            else:
-                st.warning("Clean speech file missing; cannot play mixed.")
-
-        current = st.session_state["votes"].get(clip_id, "medium")
-        choice = st.selectbox(
-            "Perceived level",
-            options=LABELS,
-            index=LABELS.index(current) if current in LABELS else 2,
-            key=clip_id,
-            label_visibility="collapsed",
-        )
-        st.session_state["votes"][clip_id] = choice
-        st.markdown("---")
+        if not is_open:
+            continue
+        with panel:
+            for row in sample_rows:
+                clip_id = row.clip_id
+                path = row.path
+
+                st.markdown(f"**Clip {row.ver}**")
+                play_mode = st.radio(
+                    "Play",
+                    options=["Noise only", "Mixed (noise + clean speech)"],
+                    key=f"mode_{clip_id}",
+                    horizontal=True,
+                )
+
+                if play_mode == "Noise only":
+                    cached = variants.get((clip_id, "noise"))
+                    st.audio(cached or noise_to_wav_bytes(str(path), row.mtime, row.level_db), format="audio/wav")
+                else:
+                    if clean_mtime is not None:
+                        cached = variants.get((clip_id, "mixed"))
+                        st.audio(cached or mixed_wav_bytes(str(path), row.mtime, row.level_db, clean_mtime), format="audio/wav")
+                    else:
+                        st.warning("Clean speech file missing; cannot play mixed.")
+
+                current = votes.get(clip_id, "medium")
+                choice = st.selectbox(
+                    "Perceived level",
+                    options=LABELS,
+                    index=LABEL_INDEX.get(current, 2),
+                    key=clip_id,
+                    label_visibility="collapsed",
+                )
+                votes[clip_id] = choice
+                st.markdown("---")
 
     st.divider()
     st.subheader("Export")
-    all_clip_ids = {r["clip_id"] for r in clip_rows}
     if st.session_state["votes"]:
         from datetime import datetime
-        clip_lookup = {r["clip_id"]: r for r in clip_rows}
+        clip_lookup = {r.clip_id: r for rows in clips_by_category.values() for r in rows}
         output = io.StringIO()
         w = csv.writer(output)
         w.writerow(["clip_id", "label", "category", "level_db", "snr_db"])
         for cid, label in st.session_state["votes"].items():
-            if cid in all_clip_ids and cid in clip_lookup:
+            if cid in clip_lookup:
                 r = clip_lookup[cid]
-                snr_db = CLEAN_SPEECH_LEVEL_DB - r["level_db"]
-                w.writerow([cid, label, r["category"], r["level_db"], round(snr_db, 1)])
+                snr_db = CLEAN_SPEECH_LEVEL_DB - r.level_db
+                w.writerow([cid, label, r.category, r.level_db, round(snr_db, 1)])
         csv_str = output.getvalue()
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         st.download_button(
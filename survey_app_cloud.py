@@ -4,102 +4,152 @@ Responses are stored in a Google Sheet instead of local CSV.
 """
 import csv
 import io
+import os
 import uuid
-from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
 
 import streamlit as st
 
 from config import CATEGORIES, LEVELS_DIR, SURVEY_MAPPING_CSV
 
 LABELS = ["very_low", "low", "medium", "high", "very_high"]
+LABEL_INDEX = {lab: i for i, lab in enumerate(LABELS)}
 
+SHEET_HEADER = ["respondent_id", "clip_id", "label", "category", "sample_id", "level_db", "timestamp"]
 
-def load_mapping():
-    """Return list of dicts with clip_id, category, sample_id, level_db."""
-    rows = []
+Clip = namedtuple("Clip", "clip_id category sample_id level_db")
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_mapping(mapping_mtime: float) -> dict[str, Clip]:
+    """Return {clip_id: Clip(clip_id, category, sample_id, level_db)} in file order.
+
+    mapping_mtime is only the cache key, so edits to the mapping file are picked up.
+    Shared by all sessions without copying; treat as read-only.
+    """
     with open(SURVEY_MAPPING_CSV, newline="") as f:
-        for row in csv.DictReader(f):
-            row["level_db"] = int(row["level_db"])
-            rows.append(row)
-    return rows
-
-
-def get_categories_in_mapping(mapping_rows):
-    """Unique categories present in mapping, in CATEGORIES order."""
-    present = {r["category"] for r in mapping_rows}
-    return [c for c in CATEGORIES if c in present]
-
-
-def get_clips_for_category(mapping_rows, category):
-    """Rows for category, sorted by sample_id then level_db."""
-    subset = [r for r in mapping_rows if r["category"] == category]
-    return sorted(subset, key=lambda r: (r["sample_id"], r["level_db"]))
-
-
-def save_to_google_sheets(respondent_id: str, votes: dict, mapping: list) -> bool:
-    """Save responses to Google Sheets using Streamlit secrets."""
-    try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        # Get credentials from Streamlit secrets
-        credentials_dict = st.secrets["gcp_service_account"]
-        
-        # Define the scope
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        
-        # Create credentials
-        credentials = Credentials.from_service_account_info(
-            credentials_dict,
-            scopes=scopes
-        )
-        
-        # Authorize and open the sheet
-        client = gspread.authorize(credentials)
-        sheet_url = st.secrets["google_sheets"]["sheet_url"]
-        spreadsheet = client.open_by_url(sheet_url)
-        worksheet = spreadsheet.sheet1  # Use first sheet
-        
-        # Prepare rows to append
-        clip_to_row = {r["clip_id"]: r for r in mapping}
-        rows_to_add = []
-        
-        for cid, label in votes.items():
-            if cid not in clip_to_row:
-                continue
-            row_data = clip_to_row[cid]
-            rows_to_add.append([
-                respondent_id,
-                cid,
-                label,
-                row_data["category"],
-                row_data["sample_id"],
-                row_data["level_db"],
-                datetime.now().isoformat()
-            ])
-        
-        if not rows_to_add:
-            return False
-        
-        # Check if sheet is empty and add header if needed
-        existing_data = worksheet.get_all_values()
-        if not existing_data:
-            worksheet.append_row([
-                "respondent_id", "clip_id", "label", "category", 
-                "sample_id", "level_db", "timestamp"
-            ])
-        
-        # Append all rows at once
-        worksheet.append_rows(rows_to_add)
-        return True
-        
-    except Exception as e:
-        st.error(f"Error saving to Google Sheets: {e}")
-        return False
+        reader = csv.reader(f)
+        header = next(reader)
+        i_clip, i_cat, i_sample, i_level = (header.index(name) for name in Clip._fields)
+        return {
+            row[i_clip]: Clip(row[i_clip], row[i_cat], row[i_sample], int(row[i_level]))
+            for row in reader
+        }
+
+
+def annotate_versions(clips: list[Clip]) -> list[tuple[Clip, int]]:
+    """Pair each clip (sorted by sample_id) with its 1-based version number within the sample."""
+    return [
+        (r, ver)
+        for _, sample_clips in groupby(clips, key=attrgetter("sample_id"))
+        for ver, r in enumerate(sample_clips, start=1)
+    ]
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def index_mapping(mapping_mtime: float) -> dict[str, list[tuple[Clip, int]]]:
+    """(clip, ver) pairs grouped by category in CATEGORIES order, sorted by sample_id then level_db.
+
+    Built once per mapping file version (mapping_mtime is only the cache key); read-only.
+    """
+    by_cat: dict[str, list[Clip]] = {}
+    for r in load_mapping(mapping_mtime).values():
+        by_cat.setdefault(r.category, []).append(r)
+    for rows in by_cat.values():
+        rows.sort(key=lambda r: (r.sample_id, r.level_db))
+    return {c: annotate_versions(by_cat[c]) for c in CATEGORIES if c in by_cat}
+
+
+@st.cache_data(show_spinner=False)
+def level_files(levels_mtime: float) -> frozenset[str]:
+    """Names of the files in LEVELS_DIR, from one directory scan.
+
+    levels_mtime is only the cache key; it changes whenever a file is added or removed.
+    """
+    with os.scandir(LEVELS_DIR) as it:
+        return frozenset(entry.name for entry in it if entry.is_file())
+
+
+@st.cache_resource
+def sheets_executor() -> ThreadPoolExecutor:
+    """Background writer shared by all sessions. One worker keeps appends (and the header check) in order."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets")
+
+
+@st.cache_resource(show_spinner=False)
+def get_worksheet():
+    """Authorized gspread handle to the responses worksheet, opened once per process.
+
+    google-auth refreshes the access token internally, so the handle stays valid.
+    """
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    # Get credentials from Streamlit secrets
+    credentials_dict = st.secrets["gcp_service_account"]
+
+    # Define the scope
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+
+    # Create credentials
+    credentials = Credentials.from_service_account_info(
+        credentials_dict,
+        scopes=scopes
+    )
+
+    # Authorize and open the sheet
+    client = gspread.authorize(credentials)
+    sheet_url = st.secrets["google_sheets"]["sheet_url"]
+    spreadsheet = client.open_by_url(sheet_url)
+    return spreadsheet.sheet1  # Use first sheet
+
+
+def append_to_google_sheet(rows: list[list]) -> None:
+    """Append rows to the responses worksheet, adding the header if the sheet is empty. Runs off the script thread."""
+    worksheet = get_worksheet()
+
+    # An empty sheet has nothing in A1; no need to download the whole sheet to find out
+    if not worksheet.acell("A1").value:
+        rows = [SHEET_HEADER] + rows
+
+    # Append header (if any) and all rows in one request
+    worksheet.append_rows(rows)
+
+
+def save_to_google_sheets(respondent_id: str, votes: dict, mapping: dict[str, Clip]) -> Future | None:
+    """Queue responses for the background Google Sheets writer.
+
+    Returns the pending write, or None if there was nothing to save.
+    """
+    # Prepare rows to append
+    rows_to_add = []
+    timestamp = datetime.now().isoformat()
+
+    for cid, label in votes.items():
+        row_data = mapping.get(cid)
+        if row_data is None:
+            continue
+        rows_to_add.append([
+            respondent_id,
+            cid,
+            label,
+            row_data.category,
+            row_data.sample_id,
+            row_data.level_db,
+            timestamp
+        ])
+
+    if not rows_to_add:
+        return None
+
+    return sheets_executor().submit(append_to_google_sheet, rows_to_add)
 
 
 def main():
@@ -110,8 +160,10 @@ def main():
     if "votes" not in st.session_state:
         st.session_state["votes"] = {}
 
-    mapping = load_mapping()
-    categories_available = get_categories_in_mapping(mapping)
+    mapping_mtime = SURVEY_MAPPING_CSV.stat().st_mtime
+    mapping = load_mapping(mapping_mtime)
+    clips_by_category = index_mapping(mapping_mtime)
+    categories_available = list(clips_by_category)
     if not categories_available:
         st.error("No categories found in survey_mapping.csv.")
         return
@@ -121,52 +173,57 @@ def main():
         options=categories_available,
         key="category_select",
     )
-    clips = get_clips_for_category(mapping, category)
+    clips = clips_by_category[category]
+    existing = level_files(LEVELS_DIR.stat().st_mtime) if LEVELS_DIR.is_dir() else frozenset()
     st.caption(f"{len(clips)} clips in this category.")
 
-    prev_sample = None
-    ver = 0
-    for row in clips:
-        clip_id = row["clip_id"]
-        sample_id = row["sample_id"]
-        level_db = row["level_db"]
-        if row["sample_id"] != prev_sample:
-            ver = 1
-            prev_sample = row["sample_id"]
-        else:
-            ver += 1
-        audio_path = LEVELS_DIR / f"{clip_id}.wav"
-
-        if not audio_path.exists():
+    votes = st.session_state["votes"]
+    for row, ver in clips:
+        clip_id = row.clip_id
+        sample_id = row.sample_id
+        file_name = f"{clip_id}.wav"
+        if file_name not in existing:
             st.warning(f"Missing audio: {clip_id}")
             continue
+        audio_path = LEVELS_DIR / file_name
 
         col1, col2, col3 = st.columns([2, 1, 2])
         with col1:
             st.markdown(f"**Sample {sample_id}, ver {ver}**")
-            st.audio(str(audio_path))
+            # A path lets Streamlit serve the file from its media endpoint under a content-hashed URL,
+            # so the browser reuses it across reruns; no second in-memory copy is kept here.
+            st.audio(str(audio_path), format="audio/wav")
         with col2:
             st.write("")
         with col3:
-            current = st.session_state["votes"].get(clip_id, "medium")
+            current = votes.get(clip_id, "medium")
             choice = st.selectbox(
                 "Perceived level",
                 options=LABELS,
-                index=LABELS.index(current) if current in LABELS else 2,
+                index=LABEL_INDEX.get(current, 2),
                 key=clip_id,
                 label_visibility="collapsed",
             )
-            st.session_state["votes"][clip_id] = choice
+            votes[clip_id] = choice
 
     st.divider()
     st.subheader("Submit or export")
+    # Surface the outcome of a background save from an earlier rerun
+    pending = st.session_state.get("sheets_write")
+    if pending is not None and pending.done():
+        del st.session_state["sheets_write"]
+        if pending.exception() is not None:
+            st.error(f"Error saving to Google Sheets: {pending.exception()}")
+            st.warning("Failed to save responses. Please try downloading instead.")
     if st.session_state["votes"]:
         col_submit, col_dl = st.columns(2)
         with col_submit:
             if st.button("Submit my responses"):
                 respondent_id = str(uuid.uuid4())
-                if save_to_google_sheets(respondent_id, st.session_state["votes"], mapping):
-                    st.success("Thanks, your responses have been saved to Google Sheets!")
+                pending = save_to_google_sheets(respondent_id, st.session_state["votes"], mapping)
+                if pending is not None:
+                    st.session_state["sheets_write"] = pending
+                    st.success("Thanks, your responses are being saved to Google Sheets!")
                     st.balloons()
                 else:
                     st.warning("Failed to save responses. Please try downloading instead.")
@@ -174,15 +231,12 @@ def main():
             output = io.StringIO()
             w = csv.writer(output)
             w.writerow(["clip_id", "label", "category", "level_db"])
-            for row in mapping:
-                cid = row["clip_id"]
-                if cid in st.session_state["votes"]:
-                    w.writerow([
-                        cid,
-                        st.session_state["votes"][cid],
-                        row["category"],
-                        row["level_db"],
-                    ])
+            # Only the voted clips, in clip_id (= mapping file) order; no pass over the whole mapping
+            votes = st.session_state["votes"]
+            w.writerows(
+                [cid, votes[cid], mapping[cid].category, mapping[cid].level_db]
+                for cid in sorted(votes) if cid in mapping
+            )
             csv_str = output.getvalue()
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             st.download_button(